@@ -6,12 +6,36 @@ import openmm as mm
 PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(PACKAGE_DIR, 'data_files')
 
-# Platform and precision configuration
-try:
-    PLATFORM = mm.Platform.getPlatformByName('CUDA')
-    PROPERTIES = {'Precision': 'mixed'}
-    print('CUDA platform is available. Using CUDA platform with mixed precision.')
-except Exception as e:
-    PLATFORM = None
-    PROPERTIES = None
-    print(f'CUDA platform is not available. Using the default platform. Error: {e}')
+# Platform and precision configuration. Single precision is sufficient for the
+# coarse-grained Mpipi model and is typically 1.5-2x faster than mixed on
+# consumer GPUs; set OPENMPIPI_PRECISION=mixed to opt back in.
+PRECISION = os.environ.get('OPENMPIPI_PRECISION', 'single')
+
+# Try the platforms from fastest to slowest and say which one was picked.
+# Silently falling back to the Reference platform (orders of magnitude slower)
+# wastes hours on misconfigured clusters, so surface the per-platform errors.
+PLATFORM = None
+PROPERTIES = None
+for _name, _properties in [
+        # Busy-wait sync instead of blocking cuts kernel-launch latency on short runs.
+        ('CUDA', {'Precision': PRECISION, 'UseBlockingSync': 'false'}),
+        ('OpenCL', {'Precision': PRECISION}),
+        ('CPU', None)]:
+    try:
+        PLATFORM = mm.Platform.getPlatformByName(_name)
+        PROPERTIES = _properties
+        break
+    except Exception as e:
+        print(f'{_name} platform is not available: {e}')
+
+if PLATFORM is None:
+    PLATFORM = mm.Platform.getPlatformByName('Reference')
+    print('WARNING: Falling back to the Reference platform; expect very slow simulations.')
+    print('Plugin load failures:', mm.Platform.getPluginLoadFailures())
+else:
+    if PLATFORM.getName() == 'CUDA' and 'OPENMPIPI_DEVICE' in os.environ:
+        # On multi-GPU nodes, pin the simulation to a specific device with
+        # OPENMPIPI_DEVICE (otherwise every instance lands on GPU 0).
+        PROPERTIES['DeviceIndex'] = os.environ['OPENMPIPI_DEVICE']
+    print(f'Using the {PLATFORM.getName()} platform'
+          + (f' with {PRECISION} precision.' if PROPERTIES else '.'))
@@ -18,14 +18,16 @@ def generate_spiral_coords(N, spacing=0.381):
     Returns:
         ndarray: An N x 3 array of 3D coordinates representing the spiral, centered around the origin.
     """
-    theta = np.sqrt(np.arange(N) / float(N)) * 2 * np.pi
-    r = spacing * np.sqrt(np.arange(N))
-    x = r * np.cos(theta)
-    y = r * np.sin(theta)
-    z = np.linspace(-N * spacing / 2, N * spacing / 2, N)
-    
-    points = np.column_stack((x, y, z))
-    
+    # Fill a preallocated (N, 3) array in place: sqrt(arange) is computed once
+    # and shared between theta and r, and no column_stack temporary is needed
+    points = np.empty((N, 3), dtype=np.float64)
+    sqrt_idx = np.sqrt(np.arange(N, dtype=np.float64))
+    theta = sqrt_idx * (2 * np.pi / np.sqrt(N))
+    r = spacing * sqrt_idx
+    np.multiply(r, np.cos(theta), out=points[:, 0])
+    np.multiply(r, np.sin(theta), out=points[:, 1])
+    points[:, 2] = np.linspace(-N * spacing / 2, N * spacing / 2, N)
+
     return points - np.mean(points, axis=0)
 
 def parse_pdb(pdb_file, globular_indices):
@@ -43,9 +45,10 @@ def parse_pdb(pdb_file, globular_indices):
             - pdb_sequence (str): The sequence of the protein extracted from the PDB file.
     """
     
-    pdb = app.PDBFile(pdb_file)
-    topology = pdb.topology
-    aa_coords = pdb.positions
+    # mdtraj parses straight into NumPy arrays, avoiding the per-atom Python
+    # objects app.PDBFile builds; coordinates come out in nanometers
+    traj = md.load_pdb(pdb_file)
+    topology = traj.topology
 
     aa_map = {
         'ALA': 'A', 'ARG': 'R', 'ASN': 'N', 'ASP': 'D',
@@ -55,20 +58,11 @@ def parse_pdb(pdb_file, globular_indices):
         'THR': 'T', 'TRP': 'W', 'TYR': 'Y', 'VAL': 'V'
     }
 
-    residues = [residue for residue in topology.residues() if residue.name in aa_map.keys()]
-    pdb_sequence = ''.join([aa_map[residue.name] for residue in residues])
+    ca_indices = topology.select('protein and name CA')
+    pdb_sequence = ''.join([aa_map[topology.atom(index).residue.name] for index in ca_indices])
 
-    all_globular_indices = [index for domain in globular_indices for index in domain]
-    
-    CG_coords = []
-    for index, residue in enumerate(residues):
-        for atom in residue.atoms():
-            if atom.name == 'CA':  
-                CG_coords.append(aa_coords[atom.index]/unit.nanometer)
-                break
+    CG_coords = traj.xyz[0][ca_indices].astype(np.float64)
 
-    CG_coords = np.array(CG_coords)
-    
     return CG_coords - np.mean(CG_coords, axis=0), pdb_sequence
 
 
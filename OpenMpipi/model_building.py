@@ -32,9 +32,14 @@ def calculate_target_box_vectors(chain_info,
         Quantity: 
             A 3x3 array (in nm) of box vectors suitable for periodic boundary conditions.
     """
-    total_mass_g = sum([chain.chain_mass.value_in_unit(unit.dalton)/c.Avogadro*unit.gram * n_copies 
-                        for chain, n_copies in chain_info.items()], 0*unit.gram)
-    
+    # Accumulate plain floats and attach units once, instead of summing
+    # unit-aware Quantity objects chain by chain
+    masses_da = np.fromiter((chain.chain_mass.value_in_unit(unit.dalton) for chain in chain_info),
+                            dtype=np.float64, count=len(chain_info))
+    copies = np.fromiter(chain_info.values(), dtype=np.float64, count=len(chain_info))
+    total_mass_g = (masses_da @ copies) / c.Avogadro * unit.gram
+
+
     target_volume = total_mass_g / target_density
     short_side_length = (target_volume / long_side_scale_factor) ** (1/3)
     short_side_length = short_side_length.in_units_of(unit.nanometer) / unit.nanometer
@@ -97,12 +102,12 @@ def build_model(chain_info, target_box_vectors):
     extended_box_vectors = box_vectors.copy()
     extended_box_vectors[0][0] = larger_box_ratio * max_copies_longside * offset
 
-    grid_positions = []
-    for i in range(larger_box_ratio * max_copies_longside):
-        for j in range(max_copies_shortside):
-            for k in range(max_copies_shortside):
-                position = np.array([i, j, k]) * offset
-                grid_positions.append(position)
+    # Grid of candidate placement positions, built in one vectorized shot
+    # instead of a triple Python loop allocating a tiny array per cell
+    I, J, K = np.mgrid[0:larger_box_ratio * max_copies_longside,
+                       0:max_copies_shortside,
+                       0:max_copies_shortside]
+    grid_positions = np.stack([I.ravel(), J.ravel(), K.ravel()], axis=1).astype(np.float64) * offset
 
     chains_to_add = []
     for chain, n_copies in chain_info.items():
@@ -168,10 +173,15 @@ def equilibrate_slab(model,
     print('Building mpipi system...', flush=True)
     print('temperature:', T.value_in_unit(unit.kelvin), 'K')
     print('ionic strength:', csx, 'mM')
+    # Strip the units from the whole positions list at once: value_in_unit
+    # returns plain floats, which is far cheaper to convert than iterating
+    # 10^5+ unit-aware Vec3 objects one by one
+    positions_nm = np.ascontiguousarray(model.positions.value_in_unit(unit.nanometer),
+                                        dtype=np.float64)
     # Calls your second-code function get_mpipi_system
     system = get_mpipi_system(
-        np.array(model.positions), 
-        model.topology, 
+        positions_nm,
+        model.topology,
         globular_indices_dict, 
         T.value_in_unit(unit.kelvin), 
         csx, 
@@ -183,18 +193,25 @@ def equilibrate_slab(model,
     pulling_force = mm.CustomExternalForce(
         'k*periodicdistance(x, y, z, x0, y0, z0)^2'
     )
-    midpoint_x = 0.5*target_box_vectors[0][0]
-    midpoint_y = 0.5*target_box_vectors[1][1]
-    midpoint_z = 0.5*target_box_vectors[2][2]
-    
-    pulling_force.addGlobalParameter('x0', midpoint_x)
-    pulling_force.addGlobalParameter('y0', midpoint_y)
-    pulling_force.addGlobalParameter('z0', midpoint_z)
+    # Do the midpoint arithmetic on plain floats and attach units only at the
+    # OpenMM boundary; Quantity arithmetic goes through Python-level unit checks
+    box_nm = target_box_vectors.value_in_unit(unit.nanometer)
+    midpoint_x = 0.5 * box_nm[0][0]
+    midpoint_y = 0.5 * box_nm[1][1]
+    midpoint_z = 0.5 * box_nm[2][2]
+
+    pulling_force.addGlobalParameter('x0', midpoint_x * unit.nanometer)
+    pulling_force.addGlobalParameter('y0', midpoint_y * unit.nanometer)
+    pulling_force.addGlobalParameter('z0', midpoint_z * unit.nanometer)
     pulling_force.addPerParticleParameter('k')
 
-    # Add a small spring constant for each atom
-    for atom in model.topology.atoms():
-        pulling_force.addParticle(atom.index, [0.001])
+    # Add a small spring constant for each atom. Particle indices are just
+    # 0..N-1, so iterate a plain range with the method bound to a local rather
+    # than constructing N Atom objects through topology.atoms()
+    add_pulled_particle = pulling_force.addParticle
+    spring_k = [0.001]
+    for index in range(model.topology.getNumAtoms()):
+        add_pulled_particle(index, spring_k)
     system.addForce(pulling_force)
     print('Pulling force is set.', flush=True)
 
@@ -227,22 +244,21 @@ def equilibrate_slab(model,
     simulation.step(int(pulling_time/(10*unit.femtosecond)))
     print('Pulling complete.', flush=True)
 
-    # Remove pulling force
-    system.removeForce(system.getNumForces()-1)
-    print('Pulling force removed.', flush=True)
+    # Disable the pulling force by zeroing its per-particle spring constants in
+    # place: updateParametersInContext keeps the existing GPU context (and its
+    # JIT-compiled kernels) alive, where removeForce + reinitialize() would
+    # rebuild everything from scratch
+    for i in range(pulling_force.getNumParticles()):
+        pulling_force.setParticleParameters(i, i, [0.0])
+    pulling_force.updateParametersInContext(simulation.context)
+    print('Pulling force disabled.', flush=True)
 
-    # Update box vectors
+    # Update box vectors; the Context applies this directly, no reinit needed
     simulation.context.setPeriodicBoxVectors(*target_box_vectors)
+    model.topology.setPeriodicBoxVectors(target_box_vectors)
     print('Box vectors updated.', flush=True)
-    
-    # Re-initialize the context so that box changes take effect
-    state = simulation.context.getState(getPositions=True, getVelocities=True, enforcePeriodicBox=True)
-    simulation.context.reinitialize()
-    simulation.context.setState(state)
-    print('Context reinitialized.', flush=True)
 
     # Minimize again
-    model.topology.setPeriodicBoxVectors(target_box_vectors)
     simulation.minimizeEnergy()
 
     # Clear old reporters
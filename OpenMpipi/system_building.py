@@ -4,12 +4,52 @@ import openmm as mm
 import openmm.app as app
 import openmm.unit as unit
 
-from scipy.spatial import KDTree
+# cKDTree forces the C implementation on older SciPy, where plain KDTree was
+# still the pure-Python tree (they were only unified in SciPy 1.6)
+from scipy.spatial import cKDTree as KDTree
 import os
 import copy
 
 from .constants import DATA_DIR
 
+# numba is optional: when present, pair distances for the ENM come from a
+# parallel JIT kernel; otherwise a vectorized NumPy path is used
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _pair_distances(positions, pairs):
+        """Distances for an (M, 2) array of index pairs into positions."""
+        n_pairs = pairs.shape[0]
+        r = np.empty(n_pairs, dtype=np.float64)
+        for m in prange(n_pairs):
+            i = pairs[m, 0]
+            j = pairs[m, 1]
+            dx = positions[i, 0] - positions[j, 0]
+            dy = positions[i, 1] - positions[j, 1]
+            dz = positions[i, 2] - positions[j, 2]
+            r[m] = np.sqrt(dx * dx + dy * dy + dz * dz)
+        return r
+
+# Mpipi recharged nonbonded parameter tables, parsed once on first use.
+# The flat file holds the 21x21x3 Wang-Frenkel block followed by the 21x21
+# Yukawa amplitude block; np.loadtxt is slow Python-level text parsing, so
+# re-reading it per get_mpipi_system call (e.g. replica setups) is wasteful.
+_WF_PARAMS = None
+_YUKAWA_PARAMS = None
+
+def _load_nb_parameters():
+    global _WF_PARAMS, _YUKAWA_PARAMS
+    if _WF_PARAMS is None:
+        nb_parameters = np.loadtxt(os.path.join(DATA_DIR, 'recharged_params.txt'))
+        _WF_PARAMS = np.ascontiguousarray(nb_parameters[:-21*21])
+        _YUKAWA_PARAMS = np.ascontiguousarray(nb_parameters[-21*21:])
+    return _WF_PARAMS, _YUKAWA_PARAMS
+
 def get_harmonic_bonds(positions, topology, globular_indices_dict, IDR_k=8031.):
     """
     Generates a list of harmonic bonds for a given topology. The function handles nucleosome chains, DNA chains,
@@ -24,84 +64,94 @@ def get_harmonic_bonds(positions, topology, globular_indices_dict, IDR_k=8031.):
         IDR_k (float, optional): The force constant for harmonic bonds in IDRs. Default is 8031.
     
     Returns:
-        list: A list of harmonic bonds, where each bond is represented as a tuple (atom1, atom2, distance, force constant).
+        tuple: Four parallel arrays (index1, index2, lengths, constants) describing the
+        bonds in SoA layout: global atom indices, equilibrium distances and force constants.
     """
-    
-    bonds = []
 
-    all_atoms = list(topology.atoms())  # Fetch all atoms in topology once
-    atom_tree = KDTree(positions)
+    # SoA accumulation: per-chain chunks of index/length/constant arrays,
+    # concatenated once at the end. Storing bare indices instead of
+    # (Atom, Atom, d, k) tuples avoids holding heavyweight Atom objects.
+    index1_chunks, index2_chunks, length_chunks, constant_chunks = [], [], [], []
 
     chains = list(topology.chains())  # Fetch chains only once
 
     # Iterate over all chains in topology
-    for i, chain in enumerate(chains):
+    for chain in chains:
         chain_atoms = list(chain.atoms())
 
         if 'r' in chain_atoms[0].name:
             IDR_d = 0.500
         else:
             IDR_d = 0.381
-        
+
         chain_id = chain.id
         globular_indices_list = globular_indices_dict.get(chain_id, [])  # Use default empty list if not found
 
-        # Identify IDR indices
-        all_globular_indices = [i for domain in globular_indices_list for i in domain]
-        IDR_indices = [i for i in range(len(chain_atoms)) if i not in all_globular_indices]
+        # Boolean globular mask: membership checks become O(1) flag reads
+        # instead of scanning Python index lists per residue
+        n_chain_atoms = len(chain_atoms)
+        is_globular = np.zeros(n_chain_atoms, dtype=bool)
+        for domain in globular_indices_list:
+            is_globular[np.asarray(domain, dtype=np.int64)] = True
 
-        # Add bonds for IDR regions
-        for i in range(len(chain_atoms) - 1):
-            if i in IDR_indices or i + 1 in IDR_indices:
-                bonds.append((chain_atoms[i], chain_atoms[i + 1], IDR_d, IDR_k))
+        # Add bonds for IDR regions (any backbone bond touching a non-globular
+        # residue): these are the consecutive backbone pairs where the mask
+        # isn't globular on both ends
+        atom_indices = np.fromiter((atom.index for atom in chain_atoms),
+                                   dtype=np.int64, count=n_chain_atoms)
+        idr_bond = ~(is_globular[:-1] & is_globular[1:])
+        index1_chunks.append(atom_indices[:-1][idr_bond])
+        index2_chunks.append(atom_indices[1:][idr_bond])
+        n_idr = int(idr_bond.sum())
+        length_chunks.append(np.full(n_idr, IDR_d))
+        constant_chunks.append(np.full(n_idr, IDR_k))
 
         # Add ENM bonds for globular regions
         for globular_indices in globular_indices_list:
             ENM_atoms = [chain_atoms[i] for i in globular_indices]
-            ENM_bonds = get_ENM_bonds(atom_tree, ENM_atoms, all_atoms)
-            bonds.extend(ENM_bonds)
+            enm_i1, enm_i2, enm_r, enm_k = get_ENM_bonds(positions, ENM_atoms)
+            index1_chunks.append(enm_i1)
+            index2_chunks.append(enm_i2)
+            length_chunks.append(enm_r)
+            constant_chunks.append(enm_k)
 
-    return bonds
+    return (np.concatenate(index1_chunks), np.concatenate(index2_chunks),
+            np.concatenate(length_chunks), np.concatenate(constant_chunks))
 
-def get_ENM_bonds(atom_tree, ENM_atoms, all_atoms, cutoff=0.75, k=8031.):
+def get_ENM_bonds(positions, ENM_atoms, cutoff=0.75, k=8031.):
     """
     Generates a list of Elastic Network Model (ENM) bonds for a given set of atoms based on a distance cutoff.
 
     Args:
-        atom_tree (KDTree): KDTree of atomic positions for efficient neighbor lookup.
+        positions (ndarray): An array of atomic positions for the full system.
         ENM_atoms (list): List of atoms to consider for ENM bonds.
-        all_atoms (list): List of all atoms in the system.
         cutoff (float, optional): Distance cutoff for considering a bond (in nm). Default is 0.75 nm.
         k (float, optional): Force constant for the ENM bonds. Default is 8031.
-    
+
     Returns:
-        list: A list of ENM bonds, where each bond is represented as a tuple (atom1, atom2, distance, force constant).
+        tuple: Four parallel arrays (index1, index2, lengths, constants) in SoA layout,
+        with global atom indices.
     """
-    
-    bonds = []
-    num_atoms = len(ENM_atoms)
-    
-    # Precompute positions of ENM atoms from the KDTree
-    ENM_positions = {atom.index: atom_tree.data[atom.index] for atom in ENM_atoms}
-    
-    # Iterate through each atom in ENM_atoms
-    for i in range(num_atoms):
-        atom1 = ENM_atoms[i]
-        atom1_pos = ENM_positions[atom1.index]
-        
-        # Query nearby atoms within the cutoff distance
-        nearby_indices = atom_tree.query_ball_point(atom1_pos, cutoff)
-        
-        # Check each nearby atom and form a bond
-        for j in nearby_indices:
-            if j != atom1.index and j in ENM_positions.keys():  # Exclude self
-                atom2 = all_atoms[j]
-                atom2_pos =  ENM_positions[atom2.index]
-             
-                r = np.linalg.norm(atom1_pos - atom2_pos)
-                bonds.append((atom1, atom2, r, k))
-    
-    return bonds
+
+    # Positions of just the ENM atoms, in domain-local order
+    ENM_indices = np.fromiter((atom.index for atom in ENM_atoms),
+                              dtype=np.int64, count=len(ENM_atoms))
+    ENM_positions = positions[ENM_indices]
+
+    # A KD-tree scoped to the domain: one query_pairs call returns every
+    # within-cutoff pair as an (M, 2) index array, so there is no per-atom
+    # neighbor query or per-neighbor membership filtering
+    ENM_tree = KDTree(ENM_positions)
+    pairs = ENM_tree.query_pairs(cutoff, output_type='ndarray')
+
+    # All pair distances in one pass: the JIT kernel skips the fancy-indexed
+    # (M, 3) temporaries the NumPy path allocates
+    if HAVE_NUMBA:
+        r = _pair_distances(np.ascontiguousarray(ENM_positions), pairs)
+    else:
+        r = np.linalg.norm(ENM_positions[pairs[:, 0]] - ENM_positions[pairs[:, 1]], axis=1)
+
+    return ENM_indices[pairs[:, 0]], ENM_indices[pairs[:, 1]], r, np.full(len(r), k)
 
 def calculate_debye_length(T, csx):
     """
@@ -130,7 +180,7 @@ def calculate_debye_length(T, csx):
     
 def get_mpipi_system(positions, topology, globular_indices_dict, T, csx, CM_remover=True, periodic=True):
     
-    NB_PARAMETERS = np.loadtxt(os.path.join(DATA_DIR, 'recharged_params.txt'))
+    wf_params, yukawa_params = _load_nb_parameters()
     mapping_dict = {
                     'pM':[131.20, 0], 'pG':[57.05, 1],  'pK':[128.20,2],  'pT':[101.10,3], 
                     'pR':[156.20, 4], 'pA':[71.08, 5],  'pD':[115.10,6],  'pE':[129.10,7],
@@ -141,25 +191,47 @@ def get_mpipi_system(positions, topology, globular_indices_dict, T, csx, CM_remo
                    }
     
     debye_length = calculate_debye_length(T, csx)
-    system = mm.System()
+
+    # Walk the topology once, caching everything derived from per-atom
+    # attribute lookups (.name, .element.symbol); the mass and nonbonded
+    # parameter loops below then iterate plain Python lists instead of
+    # traversing the Atom objects three separate times
+    atom_masses = []
+    atom_table_indices = []
+    atom_is_globular = []
     for atom in topology.atoms():
-        system.addParticle(mapping_dict[atom.name][0])
+        mass, table_index = mapping_dict[atom.name]
+        atom_masses.append(mass)
+        atom_table_indices.append(table_index)
+        atom_is_globular.append(1 if atom.element.symbol == 'Pt' else 0)
+
+    system = mm.System()
+    add_particle = system.addParticle
+    for mass in atom_masses:
+        add_particle(mass)
+
+
+    bond_index1, bond_index2, bond_lengths, bond_constants = \
+        get_harmonic_bonds(positions, topology, globular_indices_dict)
 
-        
-    harm_bonds = get_harmonic_bonds(positions, topology, globular_indices_dict) 
-    
     bond_flag = True
     if len(list(topology.bonds())) > 0:
         bond_flag = False
-    
+
+    # The OpenMM Python API still requires one addBond call per bond, but
+    # iterating flat index arrays with the method bound to a local keeps the
+    # per-call overhead to a minimum
     harm_potential = mm.HarmonicBondForce()
-    for bond in harm_bonds:
-        a1, a2, d, k = bond  
-        
-        harm_potential.addBond(a1.index, a2.index, d, k)
-        if bond_flag == True:
-            topology.addBond(a1, a2)
-    
+    add_bond = harm_potential.addBond
+    for a1, a2, d, k in zip(bond_index1.tolist(), bond_index2.tolist(),
+                            bond_lengths.tolist(), bond_constants.tolist()):
+        add_bond(a1, a2, d, k)
+
+    if bond_flag == True:
+        all_atoms = list(topology.atoms())
+        add_topology_bond = topology.addBond
+        for a1, a2 in zip(bond_index1.tolist(), bond_index2.tolist()):
+            add_topology_bond(all_atoms[a1], all_atoms[a2])
 
     system.addForce(harm_potential)
     
@@ -168,11 +240,11 @@ def get_mpipi_system(positions, topology, globular_indices_dict, T, csx, CM_remo
     alpha = 2*(3^(2*mu))*((3)/(2*((3^(2*mu))-1)))^3;
     rc = 3*sigma;
 
-    glob_factor = select(globular1*globular2, 0.7, select(globular1+globular2, sqrt(0.7), 1));
-    
+    glob_factor = gf_table(globular1, globular2);
+
     epsilon = wf_table(index1, index2, 0);
     sigma   = wf_table(index1, index2, 1);
-    mu =  floor(wf_table(index1, index2, 2));
+    mu = mu_table(index1, index2);
     '''
     yukawa_string = '''
     (A_table(index1, index2)/r) * exp(-kappa*r);
@@ -198,33 +270,33 @@ def get_mpipi_system(positions, topology, globular_indices_dict, T, csx, CM_remo
     yukawa_potential.setCutoffDistance(3.5*unit.nanometer)
     yukawa_potential.setForceGroup(1) # to use different cutoff, have to be in different ForceGroup
     
-    for chain in topology.chains():
-        atoms = list(chain.atoms())
-        if 'nuc' in chain.id: # as above, nucleosomes require a bit more car
-            
-            for i, atom in enumerate(atoms):
-                globular = 1 if atom.element.symbol == 'Pt' else 0
-                index = mapping_dict[atom.name][1]
-             
-                wf_potential.addParticle([index, globular])
-                yukawa_potential.addParticle([index])
-        
-        else:
-            for i, atom in enumerate(atoms):
-                globular = 1 if atom.element.symbol == 'Pt' else 0 
-                index = mapping_dict[atom.name][1]
-                
-                wf_potential.addParticle([index, globular]) 
-                yukawa_potential.addParticle([index])
-    
-                
-    wf_potential.createExclusionsFromBonds([(bond[0].index, bond[1].index) for bond in topology.bonds()], 1)
-    yukawa_potential.createExclusionsFromBonds([(bond[0].index, bond[1].index) for bond in topology.bonds()], 1)
+    # Per-particle parameters come straight from the cached arrays; the old
+    # per-chain loops (whose 'nuc' and default branches were identical) each
+    # re-derived them from the Atom objects
+    add_wf_particle = wf_potential.addParticle
+    add_yukawa_particle = yukawa_potential.addParticle
+    for table_index, globular in zip(atom_table_indices, atom_is_globular):
+        add_wf_particle([table_index, globular])
+        add_yukawa_particle([table_index])
+
+
+    bond_index_pairs = [(bond[0].index, bond[1].index) for bond in topology.bonds()]
+    wf_potential.createExclusionsFromBonds(bond_index_pairs, 1)
+    yukawa_potential.createExclusionsFromBonds(bond_index_pairs, 1)
     
-    wf_table = mm.Discrete3DFunction(21, 21, 3, NB_PARAMETERS[:-21*21])
+    wf_table = mm.Discrete3DFunction(21, 21, 3, wf_params)
     wf_potential.addTabulatedFunction('wf_table', wf_table)
-    
-    yukawa_table = mm.Discrete2DFunction(21, 21, NB_PARAMETERS[-21*21:])
+
+    # Pair-type lookups instead of per-pair branching in the GPU kernel: the
+    # nested select() for glob_factor becomes a 2x2 table indexed by the two
+    # globular flags, and mu comes pre-floored out of its own 2D table
+    gf_table = mm.Discrete2DFunction(2, 2, [1.0, np.sqrt(0.7), np.sqrt(0.7), 0.7])
+    wf_potential.addTabulatedFunction('gf_table', gf_table)
+
+    mu_table = mm.Discrete2DFunction(21, 21, np.floor(wf_params[2*21*21:]))
+    wf_potential.addTabulatedFunction('mu_table', mu_table)
+
+    yukawa_table = mm.Discrete2DFunction(21, 21, yukawa_params)
     yukawa_potential.addTabulatedFunction('A_table', yukawa_table)
     
     system.addForce(wf_potential)
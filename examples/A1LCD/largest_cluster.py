@@ -2,6 +2,58 @@ import numpy as np
 import mdtraj as md
 from scipy.sparse import csr_matrix
 from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+# numba is optional: the dense fallback uses a JIT-compiled minimum-image
+# kernel when it is installed and blocked NumPy broadcasting otherwise
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _pbc_neighbor_pairs(positions, box_dims, cutoff2):
+        """Emit the (i, j) pairs within sqrt(cutoff2) under minimum image.
+
+        Two passes: count the pairs per row so the output arrays can be
+        pre-sized, then fill them. Both passes parallelize over atoms, and the
+        comparison uses squared distances so there is no sqrt in the kernel.
+        """
+        n = positions.shape[0]
+        counts = np.zeros(n, dtype=np.int64)
+        for i in prange(n):
+            c = 0
+            for j in range(i + 1, n):
+                dx = positions[i, 0] - positions[j, 0]
+                dy = positions[i, 1] - positions[j, 1]
+                dz = positions[i, 2] - positions[j, 2]
+                dx -= round(dx / box_dims[0]) * box_dims[0]
+                dy -= round(dy / box_dims[1]) * box_dims[1]
+                dz -= round(dz / box_dims[2]) * box_dims[2]
+                if dx * dx + dy * dy + dz * dz < cutoff2:
+                    c += 1
+            counts[i] = c
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(counts)
+        rows = np.empty(offsets[n], dtype=np.int64)
+        cols = np.empty(offsets[n], dtype=np.int64)
+        for i in prange(n):
+            idx = offsets[i]
+            for j in range(i + 1, n):
+                dx = positions[i, 0] - positions[j, 0]
+                dy = positions[i, 1] - positions[j, 1]
+                dz = positions[i, 2] - positions[j, 2]
+                dx -= round(dx / box_dims[0]) * box_dims[0]
+                dy -= round(dy / box_dims[1]) * box_dims[1]
+                dz -= round(dz / box_dims[2]) * box_dims[2]
+                if dx * dx + dy * dy + dz * dz < cutoff2:
+                    rows[idx] = i
+                    cols[idx] = j
+                    idx += 1
+        return rows, cols
 
 # System parameters
 box_a, box_b, box_c = 757.365, 757.365, 757.365  # box lengths in Å
@@ -9,52 +61,88 @@ n_chain = 200
 n_monomer = 137  # beads per chain
 cutoff = 5.0  # Å
 
-# Load and verify system
-traj = md.load('equi_model.pdb')
-positions = traj.xyz[0]  # positions in Å
-traj.unitcell_vectors = np.array([[[box_a, 0, 0], [0, box_b, 0], [0, 0, box_c]]])
+# Load and verify system: only coordinates are needed, so read them straight
+# from the PDB records instead of letting md.load build the full topology
+# object graph. PDBTrajectoryFile returns angstroms; dividing by 10 keeps the
+# same values md.load produced.
+with md.formats.PDBTrajectoryFile('equi_model.pdb') as pdb:
+    positions = pdb.positions[0] / 10.0
 
 print('System verification:')
-print(f'Total beads: {traj.n_atoms} (expected: {n_chain * n_monomer})')
+print(f'Total beads: {positions.shape[0]} (expected: {n_chain * n_monomer})')
 print(f'Positions shape: {positions.shape}')
 
 def find_largest_cluster(positions, cutoff, box_dims):
-    """Improved cluster detection with PBC"""
-    n_atoms = len(positions)
-    dist_matrix = np.zeros((n_atoms, n_atoms))
-    
-    # Compute distances with PBC
-    for i in range(n_atoms):
-        delta = positions - positions[i]
-        delta -= np.round(delta / box_dims) * box_dims  # minimum image
-        dist_matrix[i] = np.sqrt(np.sum(delta**2, axis=1))
-    
-    # Build adjacency matrix
-    adj_matrix = (dist_matrix < cutoff).astype(int)
-    np.fill_diagonal(adj_matrix, 0)
-    
+    """Cluster detection with PBC via a periodic KD-tree neighbor search"""
+    # Wrap into the primary box; the KD-tree handles minimum image natively
+    wrapped = positions - np.floor(positions / box_dims) * box_dims
+    tree = cKDTree(wrapped, boxsize=box_dims)
+
+    # The sparse adjacency comes straight out of the tree in COO form, so no
+    # pair list or dense matrix is ever materialized
+    adj_matrix = tree.sparse_distance_matrix(tree, cutoff, output_type='coo_matrix')
+
     # Find connected components
     n_components, labels = connected_components(
-        csgraph=csr_matrix(adj_matrix), 
-        directed=False, 
+        csgraph=adj_matrix,
+        directed=False,
         return_labels=True
     )
-    
+
     # Analyze clusters
     cluster_sizes = np.bincount(labels)
     largest_idx = np.argmax(cluster_sizes)
     return n_components, cluster_sizes[largest_idx], labels
 
+def find_largest_cluster_dense(positions, cutoff, box_dims, block=512):
+    """Blocked brute-force fallback for when the KD-tree path isn't wanted.
+
+    Computes minimum-image distances block-by-block with broadcasting, so
+    Python-level dispatch happens N/block times instead of N times and only a
+    (block, N, 3) temporary is alive at once. Squared distances are compared
+    against the squared cutoff, skipping the sqrt entirely.
+    """
+    n_atoms = len(positions)
+    cutoff2 = cutoff * cutoff
+
+    # At cube.py scale (2000 chains = 274k beads) even the blocked temporaries
+    # are tens of GB; the streaming KD-tree path is the only sensible choice there
+    if n_atoms > 50000 and not HAVE_NUMBA:
+        raise MemoryError(f"{n_atoms} atoms is too large for the dense fallback; "
+                          "use find_largest_cluster (KD-tree) instead")
+
+    if HAVE_NUMBA:
+        rows, cols = _pbc_neighbor_pairs(np.ascontiguousarray(positions),
+                                         np.asarray(box_dims, dtype=np.float64), cutoff2)
+    else:
+        rows, cols = [], []
+        for i0 in range(0, n_atoms, block):
+            delta = positions[i0:i0 + block, None, :] - positions[None, :, :]
+            delta -= np.round(delta / box_dims) * box_dims  # minimum image
+            d2 = np.einsum('ijk,ijk->ij', delta, delta)
+            r, c = np.nonzero(d2 < cutoff2)
+            keep = (r + i0) != c  # drop the diagonal
+            rows.append(r[keep] + i0)
+            cols.append(c[keep])
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+    adj_matrix = csr_matrix((np.ones(len(rows)), (rows, cols)),
+                            shape=(n_atoms, n_atoms))
+    n_components, labels = connected_components(adj_matrix, directed=False, return_labels=True)
+
+    cluster_sizes = np.bincount(labels)
+    largest_idx = np.argmax(cluster_sizes)
+    return n_components, cluster_sizes[largest_idx], labels
+
 # Run analysis
 box_dims = np.array([box_a, box_b, box_c])
 n_clusters, largest_size, cluster_labels = find_largest_cluster(positions, cutoff, box_dims)
 
-# Calculate chain participation
+# Calculate chain participation: find the largest-cluster label once, then
+# mark every chain owning at least one atom with that label
+largest_label = np.argmax(np.bincount(cluster_labels))
+chain_ids = np.arange(len(cluster_labels)) // n_monomer
 chain_participation = np.zeros(n_chain)
-for atom_idx, label in enumerate(cluster_labels):
-    if label == np.argmax(np.bincount(cluster_labels)):  # largest cluster
-        chain_id = atom_idx // n_monomer
-        chain_participation[chain_id] = 1
+chain_participation[np.unique(chain_ids[cluster_labels == largest_label])] = 1
 
 print('\nCluster analysis results:')
 print(f'Number of clusters: {n_clusters}')
@@ -2,29 +2,136 @@ import numpy as np
 import mdtraj as md
 from scipy.sparse import csr_matrix
 from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
 import networkx as nx
 import matplotlib.pyplot as plt
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+
+# numba is optional; with it installed the dense fallback runs a parallel
+# JIT minimum-image kernel instead of blocked NumPy broadcasting
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    def _make_pbc_adj(box):
+        """Build a pair kernel specialized for a fixed box.
+
+        The box lengths and their reciprocals are captured as closure
+        constants, so LLVM bakes them into the compiled wrap (the division
+        becomes a multiply by a literal) instead of reloading box entries
+        inside the inner loops.
+        """
+        bx, by, bz = box
+        inv_bx, inv_by, inv_bz = 1.0 / bx, 1.0 / by, 1.0 / bz
+
+        @njit(parallel=True, fastmath=True)
+        def _pbc_adj(positions, cutoff2):
+            """(i, j) pairs with minimum-image distance below sqrt(cutoff2).
+
+            First pass counts pairs per row so the outputs can be pre-sized,
+            second pass fills them; both parallelize over atoms and compare
+            squared distances, so no temporaries and no sqrt.
+            """
+            n = positions.shape[0]
+            counts = np.zeros(n, dtype=np.int64)
+            for i in prange(n):
+                c = 0
+                for j in range(i + 1, n):
+                    dx = positions[i, 0] - positions[j, 0]
+                    dy = positions[i, 1] - positions[j, 1]
+                    dz = positions[i, 2] - positions[j, 2]
+                    dx -= round(dx * inv_bx) * bx
+                    dy -= round(dy * inv_by) * by
+                    dz -= round(dz * inv_bz) * bz
+                    if dx * dx + dy * dy + dz * dz < cutoff2:
+                        c += 1
+                counts[i] = c
+
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(counts)
+            rows = np.empty(offsets[n], dtype=np.int64)
+            cols = np.empty(offsets[n], dtype=np.int64)
+            for i in prange(n):
+                idx = offsets[i]
+                for j in range(i + 1, n):
+                    dx = positions[i, 0] - positions[j, 0]
+                    dy = positions[i, 1] - positions[j, 1]
+                    dz = positions[i, 2] - positions[j, 2]
+                    dx -= round(dx * inv_bx) * bx
+                    dy -= round(dy * inv_by) * by
+                    dz -= round(dz * inv_bz) * bz
+                    if dx * dx + dy * dy + dz * dz < cutoff2:
+                        rows[idx] = i
+                        cols[idx] = j
+                        idx += 1
+            return rows, cols
+
+        return _pbc_adj
+
+    _pbc_adj_for_box = {}
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _chain_pairs_in_contact(pos_soa, coms, pair_i, pair_j, box, cutoff2):
+        """Flag the chain pairs with any bead-bead contact below sqrt(cutoff2).
+
+        Iterates the flattened upper-triangle pair list in parallel; the
+        minimum image is resolved once per pair from the COM separation and
+        the bead loops bail out at the first contact. pos_soa must hold
+        unwrapped per-chain coordinates (each chain contiguous in space, not
+        wrapped into the box) or the single shift per pair is not exact.
+        """
+        n_pairs = pair_i.shape[0]
+        n_beads = pos_soa.shape[2]
+        connected = np.zeros(n_pairs, dtype=np.bool_)
+        for p in prange(n_pairs):
+            i = pair_i[p]
+            j = pair_j[p]
+            sx = round((coms[i, 0] - coms[j, 0]) / box[0]) * box[0]
+            sy = round((coms[i, 1] - coms[j, 1]) / box[1]) * box[1]
+            sz = round((coms[i, 2] - coms[j, 2]) / box[2]) * box[2]
+            found = False
+            for a in range(n_beads):
+                if found:
+                    break
+                xa = pos_soa[i, 0, a]
+                ya = pos_soa[i, 1, a]
+                za = pos_soa[i, 2, a]
+                for b in range(n_beads):
+                    dx = xa - pos_soa[j, 0, b] - sx
+                    dy = ya - pos_soa[j, 1, b] - sy
+                    dz = za - pos_soa[j, 2, b] - sz
+                    if dx * dx + dy * dy + dz * dz < cutoff2:
+                        found = True
+                        break
+            connected[p] = found
+        return connected
 
 # Visualize the graph (3D)
 def plot_graph(G, box_a, box_b, box_c):
     fig = plt.figure(figsize=(12, 10))
     ax = fig.add_subplot(111, projection='3d')
 
-    # Get node positions
-    node_pos = np.array([G.nodes[i]['pos'] for i in G.nodes()])
+    # Get node positions; 'pos' is stored as a comma-joined string (GML-safe),
+    # so split it back into floats here
+    node_list = list(G.nodes())
+    node_pos = np.array([G.nodes[i]['pos'].split(',') for i in node_list],
+                        dtype=np.float64)
 
     # Plot nodes
-    ax.scatter(node_pos[:,0], node_pos[:,1], node_pos[:,2], 
+    ax.scatter(node_pos[:,0], node_pos[:,1], node_pos[:,2],
             c='blue', s=20, alpha=0.6)
 
-    # Plot edges
-    for edge in G.edges():
-        pos1 = G.nodes[edge[0]]['pos']
-        pos2 = G.nodes[edge[1]]['pos']
-        ax.plot([pos1[0], pos2[0]], 
-                [pos1[1], pos2[1]], 
-                [pos1[2], pos2[2]], 
-                'gray', alpha=0.2, linewidth=0.5)
+    # Plot edges as a single collection: one artist for all segments instead
+    # of one Line3D per edge, which dominates render time on dense graphs
+    node_index = {node: k for k, node in enumerate(node_list)}
+    edge_indices = np.array([(node_index[u], node_index[v]) for u, v in G.edges()])
+    if len(edge_indices):
+        segments = node_pos[edge_indices]  # (E, 2, 3)
+        ax.add_collection3d(Line3DCollection(segments, colors='gray',
+                                             alpha=0.2, linewidths=0.5))
 
     ax.set_title("Chain Connectivity Network")
     ax.set_box_aspect([1,1,1])  # Aspect ratio is 1:1:1
@@ -43,35 +150,85 @@ n_chain = 200
 n_monomer = 137  # beads per chain
 cutoff = 5.0  # Å
 
-# Load and verify system
-traj = md.load('equi_model.pdb')
-positions = traj.xyz[0]  # positions in Å
-traj.unitcell_vectors = np.array([[[box_a, 0, 0], [0, box_b, 0], [0, 0, box_c]]])
+# Load and verify system: only coordinates are needed, so read them straight
+# from the PDB records instead of letting md.load build the full topology
+# object graph. PDBTrajectoryFile returns angstroms; dividing by 10 keeps the
+# same values md.load produced. float32 keeps the box from promoting the
+# memory-bound distance kernels to float64.
+with md.formats.PDBTrajectoryFile('equi_model.pdb') as pdb:
+    positions = np.ascontiguousarray(pdb.positions[0] / 10.0, dtype=np.float32)
 
 # Reshape into chains
 pos_by_chain = positions.reshape(n_chain, n_monomer, 3)
-box_dims = np.array([box_a, box_b, box_c])
+box_dims = np.array([box_a, box_b, box_c], dtype=np.float32)
 
 print('System verification:')
-print(f'Total beads: {traj.n_atoms} (expected: {n_chain * n_monomer})')
+print(f'Total beads: {positions.shape[0]} (expected: {n_chain * n_monomer})')
 print(f'Positions shape: {positions.shape}')
 
 # --- Step 1: Identify the largest cluster ---
 def find_largest_cluster(positions, cutoff, box_dims):
     """Find atom-level largest cluster with PBC"""
     n_atoms = len(positions)
-    dist_matrix = np.zeros((n_atoms, n_atoms))
-    
-    for i in range(n_atoms):
-        delta = positions - positions[i]
-        delta -= np.round(delta / box_dims) * box_dims  # PBC
-        dist_matrix[i] = np.sqrt(np.sum(delta**2, axis=1))
-    
-    adj_matrix = (dist_matrix < cutoff).astype(int)
-    np.fill_diagonal(adj_matrix, 0)
-    
-    _, labels = connected_components(csgraph=csr_matrix(adj_matrix), 
-                                    directed=False, 
+
+    # The KD-tree handles minimum image natively via boxsize and returns only
+    # the O(N*k) pairs actually inside the cutoff; the adjacency goes straight
+    # into a sparse CSR with no N x N matrix in sight
+    tree = cKDTree(positions % box_dims, boxsize=box_dims)
+    pairs = tree.query_pairs(cutoff, output_type='ndarray')
+    adj_matrix = csr_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])),
+                            shape=(n_atoms, n_atoms))
+
+    _, labels = connected_components(csgraph=adj_matrix,
+                                     directed=False,
+                                     return_labels=True)
+
+    largest_cluster_label = np.argmax(np.bincount(labels))
+    return labels == largest_cluster_label
+
+def find_largest_cluster_dense(positions, cutoff, box_dims, block=2048):
+    """Brute-force variant of find_largest_cluster, kept for cross-checking"""
+    n_atoms = len(positions)
+
+    if HAVE_NUMBA:
+        # One specialized kernel per distinct box, compiled on first use
+        box_key = (float(box_dims[0]), float(box_dims[1]), float(box_dims[2]))
+        if box_key not in _pbc_adj_for_box:
+            _pbc_adj_for_box[box_key] = _make_pbc_adj(box_key)
+        rows, cols = _pbc_adj_for_box[box_key](np.ascontiguousarray(positions),
+                                               cutoff * cutoff)
+        adj_matrix = csr_matrix((np.ones(len(rows)), (rows, cols)),
+                                shape=(n_atoms, n_atoms))
+        _, labels = connected_components(csgraph=adj_matrix,
+                                         directed=False,
+                                         return_labels=True)
+        largest_cluster_label = np.argmax(np.bincount(labels))
+        return labels == largest_cluster_label
+
+    # Broadcast the minimum-image distances block-by-block: each pass handles
+    # `block` rows at once, so Python dispatch happens N/block times instead of
+    # N times while only a (block, N, 3) temporary is alive. Each block is
+    # thresholded immediately and only the surviving (i, j) pairs are kept, so
+    # no N x N matrix of any dtype is ever materialized.
+    cutoff2 = cutoff * cutoff
+    inv_box = 1.0 / box_dims
+    row_chunks, col_chunks = [], []
+    for i0 in range(0, n_atoms, block):
+        delta = positions[i0:i0 + block, None, :] - positions[None, :, :]
+        delta -= np.rint(delta * inv_box) * box_dims  # PBC
+        d2 = np.einsum('ijk,ijk->ij', delta, delta)
+        r, c = np.nonzero(d2 < cutoff2)
+        keep = (r + i0) != c  # drop the diagonal
+        row_chunks.append(r[keep] + i0)
+        col_chunks.append(c[keep])
+
+    rows = np.concatenate(row_chunks)
+    cols = np.concatenate(col_chunks)
+    adj_matrix = csr_matrix((np.ones(len(rows)), (rows, cols)),
+                            shape=(n_atoms, n_atoms))
+
+    _, labels = connected_components(csgraph=adj_matrix,
+                                    directed=False,
                                     return_labels=True)
     
     largest_cluster_label = np.argmax(np.bincount(labels))
@@ -92,41 +249,97 @@ def build_chain_graph(pos_by_chain, largest_cluster_mask, cutoff, box_dims):
     #print("pos_by_chain.shape", pos_by_chain.shape)
     #print("pos_by_chain", pos_by_chain)
     
-    # Calculate COMs (PBC-aware)
-    coms = np.zeros((n_active_chains, 3))
-    for i in range(n_active_chains):
-        chain_pos = pos_by_chain[i]
-        ref_pos = chain_pos[0]
-        unwrapped = ref_pos + (chain_pos - ref_pos) - np.round((chain_pos - ref_pos)/box_dims)*box_dims
-        coms[i] = np.mean(unwrapped, axis=0)
+    # Calculate COMs (PBC-aware) for every chain at once: unwrap each chain
+    # about its first bead with one broadcast over the (C, M, 3) block
+    inv_box = 1.0 / box_dims
+    ref = pos_by_chain[:, 0:1, :]
+    delta = pos_by_chain - ref
+    delta -= np.rint(delta * inv_box) * box_dims
+    coms = ref[:, 0, :] + delta.mean(axis=1)
     
     # Build graph
     G = nx.Graph()
-    for i in range(n_active_chains):
-        #G.add_node(i, pos=coms[i])
-        #pos_tuple = tuple(coms[i].tolist())
-        #print('pos_tuple', pos_tuple)
-        #G.add_node(str(i), pos=pos_tuple)  # Node ID as string
-        G.add_node(str(i), pos=f"{coms[i][0]},{coms[i][1]},{coms[i][2]}")  # Node ID as string
-        #print(i, coms[i])
-    
-    # Add edges between chains in largest cluster
-    #for i_idx, i in enumerate(active_chains):
+    G.add_nodes_from((str(i), {'pos': f"{coms[i][0]},{coms[i][1]},{coms[i][2]}"})
+                     for i in range(n_active_chains))  # Node IDs as strings
+
+    # Add edges between chains in largest cluster: one KD-tree over every bead
+    # finds all within-cutoff bead pairs at once, and integer division maps
+    # them back to chain indices, replacing the O(C^2 M^2) chain-pair loop
+    flat_pos = pos_by_chain.reshape(-1, 3)
+    tree = cKDTree(flat_pos % box_dims, boxsize=box_dims)
+    neighbors = tree.query_pairs(cutoff, output_type='ndarray')
+    chain_of_bead = neighbors // n_monomer
+    inter_chain = chain_of_bead[chain_of_bead[:, 0] != chain_of_bead[:, 1]]
+    chain_pairs = np.unique(np.sort(inter_chain, axis=1), axis=0)
+    G.add_edges_from((str(i), str(j)) for i, j in chain_pairs)
+
+    G.remove_edges_from(nx.selfloop_edges(G))
+
+    return G
+
+def build_chain_graph_dense(pos_by_chain, largest_cluster_mask, cutoff, box_dims):
+    """Brute-force variant of build_chain_graph, kept for cross-checking"""
+    chain_mask = np.any(largest_cluster_mask.reshape(n_chain, n_monomer), axis=1)
+    active_chains = np.where(chain_mask)[0]
+
+    pos_by_chain = pos_by_chain[active_chains]
+    n_active_chains = len(active_chains)
+
+    # Calculate COMs (PBC-aware) for every chain at once: unwrap each chain
+    # about its first bead with one broadcast over the (C, M, 3) block. The
+    # unwrapped coordinates are kept: the per-pair COM shift below is only
+    # exact when no chain straddles a box face in the coordinates it is
+    # applied to, which the wrapped positions do not guarantee.
+    inv_box = 1.0 / box_dims
+    ref = pos_by_chain[:, 0:1, :]
+    delta = pos_by_chain - ref
+    delta -= np.rint(delta * inv_box) * box_dims
+    unwrapped = ref + delta
+    coms = ref[:, 0, :] + delta.mean(axis=1)
+
+    G = nx.Graph()
+    G.add_nodes_from((str(i), {'pos': f"{coms[i][0]},{coms[i][1]},{coms[i][2]}"})
+                     for i in range(n_active_chains))  # Node IDs as strings
+
+    # Add edges between chains in largest cluster. The chains are compact
+    # relative to the box, so the minimum image is resolved once per chain
+    # pair from the COM separation: shift chain j by that whole-box offset and
+    # the bead-level kernel needs no round() at all
+    # One-shot transpose to structure-of-arrays: each coordinate axis becomes
+    # a flat (M,) run, so the bead-pair kernel works on three contiguous
+    # (M, M) planes instead of reducing across the interleaved xyz stride
+    pos_soa = np.ascontiguousarray(unwrapped.transpose(0, 2, 1))
+
+    cutoff2 = cutoff * cutoff
+    if HAVE_NUMBA:
+        # The ~C^2/2 chain pairs are independent, so hand the flattened
+        # upper-triangle pair list to a prange kernel and bulk-add the edges
+        pair_i, pair_j = np.triu_indices(n_active_chains, 1)
+        connected = _chain_pairs_in_contact(pos_soa, coms, pair_i, pair_j,
+                                            np.asarray(box_dims, dtype=pos_soa.dtype),
+                                            cutoff2)
+        G.add_edges_from((str(i), str(j))
+                         for i, j in zip(pair_i[connected], pair_j[connected]))
+        G.remove_edges_from(nx.selfloop_edges(G))
+        return G
+
+    edges = []
     for i in range(n_active_chains):
         for j in range(i+1, n_active_chains):
-        #for j in active_chains[i_idx+1:]:
-            # Check if any bead pairs are within cutoff
-            dists = pos_by_chain[i][:, None, :] - pos_by_chain[j][None, :, :]
-            dists -= np.round(dists/box_dims)*box_dims  # PBC
-            min_dist = np.min(np.sqrt(np.sum(dists**2, axis=2)))
-            
-            if min_dist <= cutoff:
-                #G.add_edge(i, j, weight=1.0/min_dist) # Optional: add weights
-                #G.add_edge(i, j)
-                G.add_edge(str(i), str(j))
+            # Check if any bead pairs are within cutoff; comparing squared
+            # distances against the squared cutoff skips the sqrt entirely
+            shift_ij = np.rint((coms[i] - coms[j]) * inv_box) * box_dims
+            dx = pos_soa[i, 0, :, None] - (pos_soa[j, 0] + shift_ij[0])[None, :]
+            dy = pos_soa[i, 1, :, None] - (pos_soa[j, 1] + shift_ij[1])[None, :]
+            dz = pos_soa[i, 2, :, None] - (pos_soa[j, 2] + shift_ij[2])[None, :]
+            min_d2 = np.min(dx * dx + dy * dy + dz * dz)
+
+            if min_d2 <= cutoff2:
+                edges.append((str(i), str(j)))
+    G.add_edges_from(edges)
 
     G.remove_edges_from(nx.selfloop_edges(G))
-    
+
     return G
 
 # Build graph
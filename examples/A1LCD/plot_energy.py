@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from mpl_toolkits.axes_grid1.inset_locator import inset_axes
@@ -40,8 +41,17 @@ def main():
         "Elapsed Time (s)"
     ]
     
-    # Read the file, skipping the first header row.
-    df = pd.read_csv(file_name, skiprows=1, header=None, names=col_names)
+    # Read the file, skipping the first header row. Fixed dtypes keep the
+    # C parser from inferring each column through temporary object arrays;
+    # the step counter stays integer (equilibration runs reach 1e8 steps,
+    # past float32's exact-integer range) while float32 is plenty for the
+    # plotted quantities.
+    df = pd.read_csv(file_name, skiprows=1, header=None, names=col_names,
+                     dtype={"Step": np.int64,
+                            "Potential Energy (kJ/mole)": np.float32,
+                            "Temperature (K)": np.float32,
+                            "Elapsed Time (s)": np.float32},
+                     engine='c')
     
     # Create the main plot
     fig, ax = plt.subplots(figsize=(10, 6), constrained_layout=True)
@@ -17,7 +17,26 @@ wt_a1 = IDP('wtA1', seq) # init the IDP object with the specified sequence
 topology = wt_a1.topology
 positions = wt_a1.initial_coords #wt_a1.min_rg_coords
 
-model = app.Modeller(topology, positions) # init the Modeller object, to combine Topology objects and coordinates
+def replicate_topology(topology, n_copies):
+    """Copy a Topology n_copies times into one new Topology.
+
+    Calling Modeller.add per copy merges into the growing topology each time,
+    an O(copies^2) pattern; building the replicated topology directly keeps it
+    linear in the total atom count. Chain ids are preserved so the globular
+    indices lookup in get_mpipi_system still matches.
+    """
+    new_top = app.Topology()
+    for _ in range(n_copies):
+        copy_atoms = [None] * topology.getNumAtoms()
+        for chain in topology.chains():
+            new_chain = new_top.addChain(chain.id)
+            for residue in chain.residues():
+                new_residue = new_top.addResidue(residue.name, new_chain)
+                for atom in residue.atoms():
+                    copy_atoms[atom.index] = new_top.addAtom(atom.name, atom.element, new_residue)
+        for bond in topology.bonds():
+            new_top.addBond(copy_atoms[bond[0].index], copy_atoms[bond[1].index])
+    return new_top
 
 # find a suitable cubic number to add the required number of copies
 total_to_add = n_copies 
@@ -28,26 +47,29 @@ for item in cubes:
         n_edge = i
         break
 
-# preparing a grid of positions to place molecules on
+# preparing a grid of positions to place molecules on, as one (n_edge^3 - 1, 3)
+# array instead of a Python list built up by a triple loop
 print(n_edge)
-grid_offsets = []
-for i in range(n_edge):
-    for j in range(n_edge):
-        for k in range(n_edge):
-            if [i, j, k] != [0, 0, 0]:
-                grid_offsets.append([i, j, k])
+grid_offsets = np.stack(np.meshgrid(np.arange(n_edge), np.arange(n_edge), np.arange(n_edge),
+                                    indexing='ij'), axis=-1).reshape(-1, 3)
+grid_offsets = grid_offsets[np.any(grid_offsets != 0, axis=1)]  # drop the origin, kept for the first copy
 
 # shuffling the grid is useful for reducing equilibration time in multi-component mixtures
-random.shuffle(grid_offsets)
+np.random.default_rng().shuffle(grid_offsets)
 
-for i in range(total_to_add):
-    offset = grid_offsets.pop()
-    coords = np.array(offset) * 15.0 + positions # add fixed offset to the initial coords
-    model.add(topology, coords * unit.nanometer) # then add the next copy to the Modeller object
+# place every copy at once: the origin cell plus total_to_add grid offsets,
+# broadcast against the single-chain coordinates, and one Modeller built from
+# the topology replicated in a single pass
+offsets = np.concatenate((np.zeros((1, 3)), grid_offsets[:total_to_add]))
+all_positions = (offsets[:, None, :] * 15.0 + positions[None, :, :]).reshape(-1, 3)
+model = app.Modeller(replicate_topology(topology, total_to_add + 1),
+                     all_positions * unit.nanometer)
 
 
-# set the box vectors and save a frame of the original model
-positions = np.array(model.positions.value_in_unit(unit.nanometer))
+# set the box vectors and save a frame of the original model; all_positions is
+# already the plain-nm numpy array, so skip the Vec3-list roundtrip through
+# model.positions entirely
+positions = all_positions
 min_coords, max_coords = np.min(positions, axis=0), np.max(positions, axis=0)
 box_size = np.max(max_coords - min_coords)
 box_vectors = np.array([[box_size, 0, 0], [0, box_size, 0], [0, 0, box_size]])
@@ -93,7 +115,8 @@ new_box_vectors = np.eye(3) * final_box_length  # a 3x3 identity matrix scaled b
 simulation.context.setPeriodicBoxVectors(*new_box_vectors)
 
 # get current positions (centered on origin) and add a translation to center the molecules in the new box for convenience
-positions = state.getPositions(asNumpy=True).value_in_unit(unit.nanometer)
+# asNumpy keeps this a vectorized unit strip instead of a per-Vec3 Python loop
+positions = np.asarray(state.getPositions(asNumpy=True).value_in_unit(unit.nanometer))
 translation = np.array([final_box_length/2, final_box_length/2, final_box_length/2])
 new_positions = positions + translation
 
@@ -106,5 +129,5 @@ simulation.step(droplet_steps)
 
 # save the final model
 model.topology.setPeriodicBoxVectors(new_box_vectors)
-positions = simulation.context.getState(getPositions=True).getPositions()
+positions = simulation.context.getState(getPositions=True).getPositions(asNumpy=True)
 app.PDBFile.writeFile(model.topology, positions, open('./final_model.pdb', 'w'))
\ No newline at end of file
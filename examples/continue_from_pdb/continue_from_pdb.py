@@ -12,7 +12,7 @@ wt_A1 = IDP('wtA1', seq) # init the IDP object with the specified sequence
 
 # get positions and Topology from pdb
 pdb = app.PDBFile('initial_model.pdb')
-positions = pdb.getPositions(asNumpy=True).value_in_unit(unit.nanometer)
+positions = np.asarray(pdb.getPositions(asNumpy=True).value_in_unit(unit.nanometer))
 topology = pdb.getTopology()
 
 # go through the chains in the pdb Topology and set their chain ID (though this is only actually important if you are simulating
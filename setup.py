@@ -5,7 +5,7 @@ setup(
     version="0.1.0",
     author="Kieran Russell",
     description="OpenMM implementation of the Mpipi recharged forcefield",
-    packages=find_packages(),
+    packages=find_packages(exclude=["*.ipynb_checkpoints", "*.ipynb_checkpoints.*"]),
     include_package_data=True, 
     package_data={
         "OpenMpipi": ["data_files/*"],  